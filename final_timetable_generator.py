@@ -1,13 +1,185 @@
 # This code requires the ortools package. Make sure it's installed in your environment.
 # If not available, you can install it via: pip install ortools
+# Optionally install jinja2 (pip install jinja2) for faster HTML rendering.
 
 from ortools.sat.python import cp_model
+from collections import Counter, defaultdict
+import numpy as np  # installed as an ortools dependency
 import json
 import os
-from datetime import datetime
+
+# jinja2 is optional; without it the section tables are built with plain f-strings
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+# Static page head (including the stylesheet) for the generated HTML timetable
+HTML_HEADER = """
+        <!DOCTYPE html>
+        <html lang="en">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>Class Timetable</title>
+            <style>
+                body {
+                    font-family: Arial, sans-serif;
+                    margin: 0;
+                    padding: 20px;
+                    background-color: #f5f5f5;
+                }
+                .container {
+                    max-width: 1200px;
+                    margin: 0 auto;
+                    background-color: white;
+                    padding: 20px;
+                    box-shadow: 0 0 10px rgba(0,0,0,0.1);
+                    border-radius: 5px;
+                }
+                h1 {
+                    color: #333;
+                    text-align: center;
+                    margin-bottom: 30px;
+                }
+                h2 {
+                    color: #444;
+                    margin-top: 40px;
+                    padding-bottom: 10px;
+                    border-bottom: 2px solid #eee;
+                }
+                table {
+                    width: 100%;
+                    border-collapse: collapse;
+                    margin-bottom: 30px;
+                }
+                th, td {
+                    border: 1px solid #ddd;
+                    padding: 10px;
+                    text-align: center;
+                }
+                th {
+                    background-color: #f2f2f2;
+                    font-weight: bold;
+                }
+                .period-time {
+                    font-size: 0.8em;
+                    color: #666;
+                    display: block;
+                }
+                .course {
+                    font-weight: bold;
+                    color: #333;
+                }
+                .teacher {
+                    font-size: 0.85em;
+                    color: #666;
+                }
+                .stats {
+                    margin-top: 40px;
+                    padding: 15px;
+                    background-color: #f9f9f9;
+                    border-radius: 5px;
+                }
+                .footer {
+                    margin-top: 30px;
+                    text-align: center;
+                    font-size: 0.8em;
+                    color: #666;
+                }
+                .lab {
+                    background-color: #e6f7ff;
+                    border-left: 2px solid #0099cc;
+                    border-right: 2px solid #0099cc;
+                }
+                .lab-start {
+                    border-top: 2px solid #0099cc;
+                    border-left: 2px solid #0099cc;
+                    border-right: 2px solid #0099cc;
+                }
+                .lab-end {
+                    border-bottom: 2px solid #0099cc;
+                    border-left: 2px solid #0099cc;
+                    border-right: 2px solid #0099cc;
+                }
+                .admin {
+                    background-color: #fff2e6;
+                }
+                .theory {
+                    background-color: #f2f2f2;
+                }
+                .free {
+                    background-color: #f9f9f9;
+                    color: #999;
+                }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <h1>Class Timetable</h1>
+        """
+
+# Section timetables, compiled once so the per-cell rendering runs in template code
+_TIMETABLE_TEMPLATE_SRC = """
+{% for s in sections %}
+                <h2>Section {{ s }} Timetable</h2>
+                <table>
+                    <thead>
+                        <tr>
+                            <th>Day</th>
+{% for period in periods %}
+                            <th>Period {{ period.id }}<span class="period-time">{{ period.time }}</span></th>
+{% endfor %}
+                        </tr>
+                    </thead>
+                    <tbody>
+{% for d in days %}
+                        <tr>
+                            <td>{{ d }}</td>
+{% for period in periods %}
+{% set cell = solution[s][d].get(period.id) %}
+{% if cell is none or cell.course == 'FREE' %}
+                            <td class="free">
+                                <div class="course">FREE</div>
+                            </td>
+{% else %}
+{% if cell.course in admin_courses %}
+{% set cell_class = 'admin' %}
+{% elif cell.course in lab_courses %}
+{% set cell_class = 'lab lab-start' if period.id in (4, 6) else 'lab lab-end' if period.id in (5, 7) else 'lab' %}
+{% else %}
+{% set cell_class = 'theory' %}
+{% endif %}
+                            <td class="{{ cell_class }}">
+                                <div class="course">{{ cell.course }}</div>
+                                <div class="teacher">{{ cell.teacher }}</div>
+                            </td>
+{% endif %}
+{% endfor %}
+                        </tr>
+{% endfor %}
+                    </tbody>
+                </table>
+{% endfor %}
+"""
+
+_TIMETABLE_TEMPLATE = (jinja2.Template(_TIMETABLE_TEMPLATE_SRC, trim_blocks=True, lstrip_blocks=True)
+                       if jinja2 is not None else None)
 
 class TimetableGenerator:
-    def __init__(self, include_free_periods=False):
+    # Period ids 1..7, shared by every loop over a day's periods
+    PERIODS_RANGE = tuple(range(1, 8))
+    
+    # Variable skeletons (a model holding only the decision variables) shared by every
+    # instance with the same structure, so batch runs only rebuild the constraints.
+    # Only identical reruns or variants that change teachers hit the cache: any change
+    # to course counts, lab flags or fixed slots builds a new skeleton. The cache keeps
+    # the most recently added skeletons and drops the oldest beyond the limit.
+    _skeleton_cache = {}
+    SKELETON_CACHE_SIZE = 8
+    
+    def __init__(self, include_free_periods=False, workers=None, time_limit=120,
+                 symmetric_sections=False, courses=None, fixed_slots=None, verbose=False):
         # Define days, periods, sections
         self.days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
         self.periods = [
@@ -19,19 +191,21 @@ class TimetableGenerator:
             {"id": 6, "time": "13:35-14:25"},
             {"id": 7, "time": "14:25-15:15"}
         ]
+        self.period_times = tuple(p["time"] for p in self.periods)
         self.sections = ['A', 'B']
         
         # Course definitions: (weekly_count, is_lab, teacher)
-        # For labs, the count is the number of lab sessions (each session is 2 consecutive periods)
-        self.courses = {
+        # For labs, the count is in periods: each lab session covers 2 consecutive periods
+        # Pass courses / fixed_slots to solve a variant without editing the defaults below
+        self.courses = dict(courses) if courses is not None else {
             'PAS': (5, False, 'Ms. Sowmiya'),
             'OS':  (6, False, 'Ms. K.Sudha'),
             'ML':  (5, False, 'Mr. Dinesh Kumar'),
             'FDSA':(5, False, 'Ms. Deepika'),
             'CN':  (6, False, 'Ms. Kirupavathy'),
             'EVS': (4, False, 'Ms. Sophia'),
-            'FDSA_LAB': (2, True, 'Ms. Deepika'),    # 2 lab sessions (4 periods total)
-            'ML_LAB':   (2, True, 'Mr. Dinesh Kumar'), # 2 lab sessions (4 periods total)
+            'FDSA_LAB': (2, True, 'Ms. Deepika'),    # 1 lab session (2 periods total)
+            'ML_LAB':   (2, True, 'Mr. Dinesh Kumar'), # 1 lab session (2 periods total)
             'PD':  (2, False, 'Ms. Kirupavathy'),
             'LIB': (1, False, 'Ms. Kirupavathy'),
             'ACT': (2, False, 'All Staff')
@@ -39,109 +213,306 @@ class TimetableGenerator:
         
         # Add free periods if requested
         if include_free_periods:
-            self.courses['FREE'] = (2, False, 'None')
+            self.courses.setdefault('FREE', (2, False, 'None'))
         
         # Fixed slots for administrative activities
-        self.fixed_slots = {
+        self.fixed_slots = set(fixed_slots) if fixed_slots is not None else {
             ('A', 'Tue', 2, 'PD'), ('A', 'Fri', 4, 'PD'),
             ('B', 'Tue', 3, 'PD'), ('B', 'Fri', 5, 'PD'),
             ('A', 'Thu', 6, 'LIB'), ('B', 'Thu', 7, 'LIB'),
             ('A', 'Fri', 7, 'ACT'), ('B', 'Sat', 7, 'ACT')
         }
         
+        # Labs can only be in periods 4-5 or 6-7
+        self.valid_lab_slots = [(4, 5), (6, 7)]  # Valid pairs of consecutive periods for labs
+        
         # Initialize model and variables
         self.model = cp_model.CpModel()
         self.assign = {}
+        self.assign_arr = None
+        self.lab_start = {}
         self.solution = None
+        self.stats = None
         self.include_free_periods = include_free_periods
+        self.symmetric_sections = symmetric_sections
+        
+        # Solver settings: CP-SAT's portfolio is tuned for up to 16 workers
+        self.workers_explicit = workers is not None
+        if workers is None:
+            workers = max(8, min(16, os.cpu_count() or 8))
+        self.workers = workers
+        self.time_limit = time_limit
+        self.verbose = verbose  # Print the CP-SAT search log
+        
+        # Course categories for membership tests inside the hot loops
+        self.lab_course_set = {c for c,(_,is_lab,_) in self.courses.items() if is_lab}
+        self.admin_courses = {'PD', 'LIB', 'ACT'}
+        
+        # Teacher name without the title, as shown in the console timetable
+        self.teacher_short = {c: (t.split('.')[-1] if '.' in t else t)
+                              for c,(_,_,t) in self.courses.items()}
+    
+    @classmethod
+    def from_template(cls, template, overrides=None):
+        # New generator with the template's settings; overrides maps course names to
+        # replacement (weekly_count, is_lab, teacher) entries for what-if runs
+        courses = dict(template.courses)
+        courses.update(overrides or {})
+        return cls(include_free_periods=template.include_free_periods,
+                   workers=template.workers if template.workers_explicit else None,
+                   time_limit=template.time_limit,
+                   symmetric_sections=template.symmetric_sections,
+                   courses=courses,
+                   fixed_slots=template.fixed_slots,
+                   verbose=template.verbose)
+    
+    def _skeleton_key(self):
+        # Everything the variable set depends on; teachers only matter for constraints
+        return (tuple(self.sections), tuple(self.days), len(self.periods),
+                tuple(self.valid_lab_slots),
+                frozenset((c, count, is_lab) for c,(count,is_lab,_) in self.courses.items()),
+                frozenset(self.fixed_slots))
     
     def generate_variables(self):
+        key = self._skeleton_key()
+        cached = self._skeleton_cache.get(key)
+        if cached is None:
+            self._create_skeleton_vars()
+            if len(self._skeleton_cache) >= self.SKELETON_CACHE_SIZE:
+                del self._skeleton_cache[next(iter(self._skeleton_cache))]
+            self._skeleton_cache[key] = (self.model.Clone(),
+                                         {k: v.index for k, v in self.assign.items()},
+                                         {k: v.index for k, v in self.lab_start.items()})
+        else:
+            # Reuse the cached variables on a fresh copy of the skeleton model
+            skeleton, assign_index, lab_start_index = cached
+            self.model = skeleton.Clone()
+            get_var = self.model.get_bool_var_from_proto_index
+            self.assign = {k: get_var(i) for k, i in assign_index.items()}
+            self.lab_start = {k: get_var(i) for k, i in lab_start_index.items()}
+        self._apply_course_specific()
+    
+    def _create_skeleton_vars(self):
         # Decision variables: assign[(sec,day,period,course)] = 1 if course at that slot
+        # Variables are only created for combinations that can actually hold:
+        # - a fixed slot gets no variable at all (see _apply_course_specific)
+        # - a course whose weekly count is fully covered by fixed slots only gets those slots
+        # - lab courses only get variables in valid lab slots with both periods open
+        fixed_by_slot = {(s,d,p): c for (s,d,p,c) in self.fixed_slots}
+        fixed_course_slots = defaultdict(set)
+        for (s,d,p,c) in self.fixed_slots:
+            fixed_course_slots[(s,c)].add((d,p))
+        
+        def allowed(s, d, p, c):
+            if fixed_by_slot.get((s,d,p), c) != c:
+                return False
+            fixed = fixed_course_slots[(s,c)]
+            return len(fixed) != self.courses[c][0] or (d,p) in fixed
+        
         for s in self.sections:
             for d in self.days:
-                for p in range(1, 8):  # 1..7
-                    for c in self.courses:
-                        self.assign[(s,d,p,c)] = self.model.NewBoolVar(f"x_{s}_{d}_{p}_{c}")
+                for p in self.PERIODS_RANGE:  # 1..7
+                    for c,(_,is_lab,_) in self.courses.items():
+                        if (s,d,p,c) not in self.fixed_slots and not is_lab and allowed(s, d, p, c):
+                            self.assign[(s,d,p,c)] = self.model.NewBoolVar(f"x_{s}_{d}_{p}_{c}")
+        
+        # lab_start[(sec,day,course,first_period)] = 1 if a lab session starts in that slot
+        lab_courses = [c for c,(_,is_lab,_) in self.courses.items() if is_lab]
+        for s in self.sections:
+            for d in self.days:
+                for c in lab_courses:
+                    for p1, p2 in self.valid_lab_slots:
+                        if allowed(s, d, p1, c) and allowed(s, d, p2, c):
+                            self.lab_start[(s,d,c,p1)] = self.model.NewBoolVar(f"ls_{s}_{d}_{c}_{p1}")
+                            for p in (p1, p2):
+                                if (s,d,p,c) not in self.fixed_slots:
+                                    self.assign[(s,d,p,c)] = self.model.NewBoolVar(f"x_{s}_{d}_{p}_{c}")
+    
+    def _apply_course_specific(self):
+        # A fixed slot holds the constant 1 for its fixed course instead of a variable
+        for key in self.fixed_slots:
+            self.assign[key] = 1
+        
+        # Same variables as an (section, day, period, course) array for slice-based sums;
+        # fixed slots hold the constant 1 and combinations without a variable the constant 0
+        self.assign_arr = np.zeros((len(self.sections), len(self.days),
+                                    len(self.PERIODS_RANGE), len(self.courses)), dtype=object)
+        for si, s in enumerate(self.sections):
+            for di, d in enumerate(self.days):
+                for pi, p in enumerate(self.PERIODS_RANGE):
+                    for ci, c in enumerate(self.courses):
+                        if (s,d,p,c) in self.assign:
+                            self.assign_arr[si,di,pi,ci] = self.assign[(s,d,p,c)]
     
     def add_constraints(self):
+        # Invert the course map once so teacher constraints only visit that teacher's courses
+        teacher_to_courses = defaultdict(list)
+        for c,(_,_,t) in self.courses.items():
+            if t != 'None':
+                teacher_to_courses[t].append(c)
+        
         # 1. Exactly one course per slot per section (or at most one if free periods allowed)
-        for s in self.sections:
-            for d in self.days:
-                for p in range(1, 8):
+        # Fixed slots already hold their course and no other variable, so they are skipped
+        fixed_slot_keys = {(s,d,p) for (s,d,p,_) in self.fixed_slots}
+        for si, s in enumerate(self.sections):
+            for di, d in enumerate(self.days):
+                for pi, p in enumerate(self.PERIODS_RANGE):
+                    if (s,d,p) in fixed_slot_keys:
+                        continue
                     if self.include_free_periods:
-                        self.model.Add(sum(self.assign[(s,d,p,c)] for c in self.courses) <= 1)
+                        self.model.AddAtMostOne(self.assign_arr[si,di,pi,:].tolist())
                     else:
-                        self.model.Add(sum(self.assign[(s,d,p,c)] for c in self.courses) == 1)
+                        self.model.AddExactlyOne(self.assign_arr[si,di,pi,:].tolist())
         
         # 2. Course counts per section - exactly the required number
-        for s in self.sections:
-            for c,(count,_,_) in self.courses.items():
-                self.model.Add(sum(self.assign[(s,d,p,c)] for d in self.days for p in range(1, 8)) == count)
+        # Lab counts are checked on session starts, each session covering two periods
+        for si, s in enumerate(self.sections):
+            for ci, (c,(count,is_lab,_)) in enumerate(self.courses.items()):
+                if is_lab:
+                    self.model.Add(2 * cp_model.LinearExpr.Sum([self.lab_start.get((s,d,c,p1), 0)
+                                                                for d in self.days
+                                                                for p1, _ in self.valid_lab_slots]) == count)
+                else:
+                    self.model.Add(cp_model.LinearExpr.Sum(self.assign_arr[si,:,:,ci].ravel().tolist()) == count)
         
         # 3. Teacher conflict across sections: no teacher teaches two slots simultaneously
-        for d in self.days:
-            for p in range(1, 8):
-                for teacher in set(t for _,_,t in self.courses.values() if t != 'None'):
-                    self.model.Add(
-                        sum(self.assign[(s,d,p,c)]
-                            for s in self.sections
-                            for c,(_,_,t) in self.courses.items() if t == teacher)
-                        <= 1)
+        # Fixed slots enter as the constant 1, which CP-SAT accepts and propagates directly
+        for teacher, clist in teacher_to_courses.items():
+            for d in self.days:
+                for p in self.PERIODS_RANGE:
+                    self.model.AddAtMostOne([
+                        self.assign[(s,d,p,c)]
+                        for s in self.sections
+                        for c in clist
+                        if (s,d,p,c) in self.assign])
         
         # 4. No same theory course twice in one day per section
+        non_theory = self.admin_courses | {'FREE'}
         theory_courses = [c for c,(cnt,is_lab,_) in self.courses.items() 
-                         if not is_lab and c not in ('PD','LIB','ACT','FREE')]
+                         if not is_lab and c not in non_theory]
         for s in self.sections:
             for d in self.days:
                 for c in theory_courses:
-                    self.model.Add(sum(self.assign[(s,d,p,c)] for p in range(1, 8)) <= 1)
+                    self.model.AddAtMostOne([self.assign[(s,d,p,c)] for p in self.PERIODS_RANGE
+                                             if (s,d,p,c) in self.assign])
         
         # 5. Lab sessions must be scheduled as continuous blocks of two periods
-        # Labs can only be in periods 4-5 or 6-7
+        # Labs only have variables in valid slots, so both periods follow the session start
         lab_courses = [c for c,(cnt,is_lab,_) in self.courses.items() if is_lab]
-        valid_lab_slots = [(4, 5), (6, 7)]  # Valid pairs of consecutive periods for labs
         
         for s in self.sections:
             for d in self.days:
-                # Only one lab per day per section
-                self.model.Add(sum(self.assign[(s,d,p,c)] 
-                                  for c in lab_courses 
-                                  for p in range(1, 8)) <= 2)  # Max 2 periods for one lab
+                # Only one lab session per day per section
+                self.model.AddAtMostOne([self.lab_start[(s,d,c,p1)]
+                                         for c in lab_courses
+                                         for p1, _ in self.valid_lab_slots
+                                         if (s,d,c,p1) in self.lab_start])
                 
                 # For each lab course
                 for c in lab_courses:
-                    # Lab can only be scheduled in valid slots (periods 4-5 or 6-7)
-                    for p1, p2 in valid_lab_slots:
-                        # If first period of slot has the lab, second period must also have it
-                        self.model.Add(self.assign[(s,d,p1,c)] == self.assign[(s,d,p2,c)])
-                    
-                    # Lab can only be in valid periods
-                    valid_periods = [p for slot in valid_lab_slots for p in slot]
-                    for p in range(1, 8):
-                        if p not in valid_periods:
-                            self.model.Add(self.assign[(s,d,p,c)] == 0)
+                    for p1, p2 in self.valid_lab_slots:
+                        if (s,d,c,p1) not in self.lab_start:
+                            continue
+                        ls = self.lab_start[(s,d,c,p1)]
+                        self.model.Add(self.assign[(s,d,p1,c)] == ls)
+                        self.model.Add(self.assign[(s,d,p2,c)] == ls)
         
         # 6. Avoid having the same subject in consecutive periods (except for labs)
         for s in self.sections:
             for d in self.days:
                 for p in range(1, 7):  # 1..6 (to avoid going out of range)
                     for c in self.courses:
-                        if not any(lab in c for lab in ['LAB']):  # Skip this constraint for lab courses
+                        if c not in self.lab_course_set:  # Skip this constraint for lab courses
                             # If a course is assigned to period p, it shouldn't be assigned to period p+1
-                            self.model.Add(self.assign[(s,d,p,c)] + self.assign[(s,d,p+1,c)] <= 1)
+                            if (s,d,p,c) in self.assign and (s,d,p+1,c) in self.assign:
+                                self.model.AddAtMostOne([self.assign[(s,d,p,c)], self.assign[(s,d,p+1,c)]])
         
-        # 7. Fixed slots for administrative activities
-        for (s, d, p, c) in self.fixed_slots:
-            self.model.Add(self.assign[(s,d,p,c)] == 1)
+        # 7. Fixed slots for administrative activities are substituted with the constant 1
+        # in generate_variables, so they need no constraint of their own
         
         # 8. If free periods are included, we don't need additional constraints
         # This constraint was making the problem too restrictive
+        
+        # Search strategy: lab sessions are the most constrained placements, so branch on
+        # their starts first. CP-SAT runs this in its fixed-search worker; the rest of the
+        # portfolio keeps its own heuristics.
+        self.model.AddDecisionStrategy(list(self.lab_start.values()),
+                                       cp_model.CHOOSE_FIRST,
+                                       cp_model.SELECT_MAX_VALUE)
     
-    def solve(self):
+    def add_symmetry_breaking(self, anchor='EVS'):
+        # Sections only differ by their fixed slots, so order the weekly pattern of an
+        # unfixed anchor course lexicographically between consecutive sections.
+        # This can cut valid timetables when the fixed slots break the symmetry.
+        for s1, s2 in zip(self.sections, self.sections[1:]):
+            vec1 = [self.assign.get((s1,d,p,anchor), 0) for d in self.days for p in self.PERIODS_RANGE]
+            vec2 = [self.assign.get((s2,d,p,anchor), 0) for d in self.days for p in self.PERIODS_RANGE]
+            
+            # eq[i] = 1 forces vec1[i] <= vec2[i]; it must be 1 while the prefixes are equal
+            eq = [self.model.NewBoolVar(f"lex_{s1}_{s2}_{i}") for i in range(len(vec1) + 1)]
+            self.model.Add(eq[0] == 1)
+            for i, (x1, x2) in enumerate(zip(vec1, vec2)):
+                self.model.Add(x1 <= x2 + 1 - eq[i])
+                self.model.Add(eq[i+1] >= eq[i] - (x2 - x1))
+    
+    def build_hint(self):
+        # Greedy warm start: fill each section round-robin with non-lab courses while
+        # respecting one course per slot, the weekly counts and no theory twice a day.
+        # Labs are left to the solver; the hint only needs to point at a good region.
+        non_theory = self.admin_courses | {'FREE'}
+        theory_courses = {c for c,(cnt,is_lab,_) in self.courses.items()
+                          if not is_lab and c not in non_theory}
+        order = [c for c,(_,is_lab,_) in self.courses.items() if not is_lab]
+        fixed_by_slot = {(s,d,p): c for (s,d,p,c) in self.fixed_slots}
+        
+        for s in self.sections:
+            remaining = {c: self.courses[c][0] for c in order}
+            for (fs, _, _, c) in self.fixed_slots:
+                if fs == s and c in remaining:  # Fixed lab slots are not tracked here
+                    remaining[c] -= 1
+            
+            turn = 0
+            for d in self.days:
+                used_today = {c for (fs,fd,_,c) in self.fixed_slots if fs == s and fd == d}
+                for p in self.PERIODS_RANGE:
+                    if (s,d,p) in fixed_by_slot:
+                        chosen = fixed_by_slot[(s,d,p)]
+                    else:
+                        chosen = None
+                        for i in range(len(order)):
+                            c = order[(turn + i) % len(order)]
+                            if remaining[c] <= 0 or (s,d,p,c) not in self.assign:
+                                continue
+                            if c in theory_courses and c in used_today:
+                                continue
+                            chosen = c
+                            turn = (turn + i + 1) % len(order)
+                            break
+                        if chosen is None:
+                            continue
+                        remaining[chosen] -= 1
+                        used_today.add(chosen)
+                    
+                    # The chosen course is on, everything else in the slot is off
+                    for c in order:
+                        if (s,d,p,c) in self.assign and not isinstance(self.assign[(s,d,p,c)], int):
+                            self.model.AddHint(self.assign[(s,d,p,c)], 1 if c == chosen else 0)
+    
+    def solve(self, feasibility_only=True):
         # Solve the model
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 120  # Increase time limit for complex problems
-        solver.parameters.num_search_workers = 8
+        solver.parameters.max_time_in_seconds = self.time_limit
+        solver.parameters.num_search_workers = self.workers
+        if feasibility_only:
+            # The model has no objective, so CP-SAT already stops at the first feasible
+            # timetable; this only makes that explicit. Extra LNS workers don't help pure
+            # feasibility, so unless a worker count was given, cap it at 8 (or fewer CPUs).
+            solver.parameters.stop_after_first_solution = True
+            if not self.workers_explicit:
+                solver.parameters.num_search_workers = min(8, os.cpu_count() or 8)
+        solver.parameters.log_search_progress = self.verbose
+        solver.parameters.cp_model_presolve = True
+        solver.parameters.linearization_level = 1  # All constraints are Boolean
         status = solver.Solve(self.model)
         
         # Check if a solution was found
@@ -149,28 +520,44 @@ class TimetableGenerator:
             print("Solution found!")
             
             # Store the solution
+            # At most one course per slot, so stop at the first assigned one
+            bfn = solver.BooleanValue
+            assign = self.assign
             self.solution = {}
             for s in self.sections:
                 self.solution[s] = {}
                 for d in self.days:
                     self.solution[s][d] = {}
-                    for p in range(1, 8):
+                    for p in self.PERIODS_RANGE:
                         for c in self.courses:
-                            if solver.Value(self.assign[(s,d,p,c)]) == 1:
+                            if (s,d,p,c) in assign and bfn(assign[(s,d,p,c)]):
                                 _, _, teacher = self.courses[c]
                                 self.solution[s][d][p] = {
                                     "course": c,
                                     "teacher": teacher
                                 }
+                                break
+            self._compute_stats()
             return True
         else:
             print("No solution found.")
             return False
     
+    def _compute_stats(self):
+        # Subject counts per section and teacher workload, shared by the console and HTML reports
+        subject_counts = {}
+        teacher_workload = Counter()
+        for s in self.sections:
+            slots = [slot for d in self.days for slot in self.solution[s][d].values()]
+            subject_counts[s] = Counter(slot["course"] for slot in slots)
+            teacher_workload.update(slot["teacher"] for slot in slots)
+        self.stats = {
+            'subject_counts': subject_counts,
+            'teacher_workload': teacher_workload
+        }
+    
     def print_timetable(self):
-        if not self.solution:
-            print("No solution to print.")
-            return
+        assert self.solution, "print_timetable() needs a solved timetable; call solve() first"
         
         # Print a separator line
         def print_separator(width=120):
@@ -182,7 +569,7 @@ class TimetableGenerator:
             print_separator()
             
             # Print header with period times
-            header = ['Day'] + [f'P{p} ({self.periods[p-1]["time"]})' for p in range(1, 8)]
+            header = ['Day'] + [f'P{p} ({self.period_times[p-1]})' for p in self.PERIODS_RANGE]
             print('{:<8}'.format(header[0]), end=' | ')
             print(' | '.join('{:<16}'.format(h) for h in header[1:]))
             print_separator()
@@ -190,7 +577,7 @@ class TimetableGenerator:
             # Print each day's schedule
             for d in self.days:
                 row = [d]
-                for p in range(1, 8):
+                for p in self.PERIODS_RANGE:
                     if p in self.solution[s][d]:
                         course = self.solution[s][d][p]["course"]
                         teacher = self.solution[s][d][p]["teacher"]
@@ -199,8 +586,7 @@ class TimetableGenerator:
                         elif teacher == "None":
                             row.append(f"{course}")
                         else:
-                            teacher_short = teacher.split('.')[-1] if '.' in teacher else teacher
-                            row.append(f"{course} ({teacher_short})")
+                            row.append(f"{course} ({self.teacher_short[course]})")
                     else:
                         row.append("FREE")  # Free period if no course assigned
                 
@@ -217,244 +603,67 @@ class TimetableGenerator:
         # Count subject occurrences per section
         for s in self.sections:
             print(f"\nSection {s} Subject Distribution:")
-            subject_counts = {}
-            for d in self.days:
-                for p in range(1, 8):
-                    if p in self.solution[s][d]:
-                        course = self.solution[s][d][p]["course"]
-                        subject_counts[course] = subject_counts.get(course, 0) + 1
-            
-            for subject, count in sorted(subject_counts.items()):
+            for subject, count in sorted(self.stats['subject_counts'][s].items()):
                 required = self.courses[subject][0]
                 print(f"{subject:10}: {count:2} periods (Required: {required})")
         
         # Count teacher workload
         print("\nTeacher Workload:")
-        teacher_workload = {}
-        for s in self.sections:
-            for d in self.days:
-                for p in range(1, 8):
-                    if p in self.solution[s][d]:
-                        teacher = self.solution[s][d][p]["teacher"]
-                        teacher_workload[teacher] = teacher_workload.get(teacher, 0) + 1
-        
-        for teacher, count in sorted(teacher_workload.items()):
+        for teacher, count in sorted(self.stats['teacher_workload'].items()):
             print(f"{teacher:15}: {count:2} periods")
     
     def generate_html(self, output_file="timetable.html"):
-        if not self.solution:
-            print("No solution to generate HTML.")
+        assert self.solution, "generate_html() needs a solved timetable; call solve() first"
+        
+        # Stream the page to a temporary file instead of building it in memory, and only
+        # replace the previous timetable once rendering has finished. Rendering errors
+        # propagate; only file I/O errors are reported here.
+        tmp_file = f"{output_file}.tmp"
+        try:
+            with open(tmp_file, 'w', buffering=1 << 16) as f:
+                self._write_html(f)
+            os.replace(tmp_file, output_file)
+        except OSError as e:
+            print(f"Error saving HTML: {e}")
             return False
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        print(f"Timetable HTML saved to {output_file}")
+        return True
+    
+    def _write_html(self, f):
+        from datetime import datetime  # Only needed once there is a timetable to render
         
-        # Create HTML content
-        html_content = """
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Class Timetable</title>
-            <style>
-                body {
-                    font-family: Arial, sans-serif;
-                    margin: 0;
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                }
-                .container {
-                    max-width: 1200px;
-                    margin: 0 auto;
-                    background-color: white;
-                    padding: 20px;
-                    box-shadow: 0 0 10px rgba(0,0,0,0.1);
-                    border-radius: 5px;
-                }
-                h1 {
-                    color: #333;
-                    text-align: center;
-                    margin-bottom: 30px;
-                }
-                h2 {
-                    color: #444;
-                    margin-top: 40px;
-                    padding-bottom: 10px;
-                    border-bottom: 2px solid #eee;
-                }
-                table {
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-bottom: 30px;
-                }
-                th, td {
-                    border: 1px solid #ddd;
-                    padding: 10px;
-                    text-align: center;
-                }
-                th {
-                    background-color: #f2f2f2;
-                    font-weight: bold;
-                }
-                .period-time {
-                    font-size: 0.8em;
-                    color: #666;
-                    display: block;
-                }
-                .course {
-                    font-weight: bold;
-                    color: #333;
-                }
-                .teacher {
-                    font-size: 0.85em;
-                    color: #666;
-                }
-                .stats {
-                    margin-top: 40px;
-                    padding: 15px;
-                    background-color: #f9f9f9;
-                    border-radius: 5px;
-                }
-                .footer {
-                    margin-top: 30px;
-                    text-align: center;
-                    font-size: 0.8em;
-                    color: #666;
-                }
-                .lab {
-                    background-color: #e6f7ff;
-                    border-left: 2px solid #0099cc;
-                    border-right: 2px solid #0099cc;
-                }
-                .lab-start {
-                    border-top: 2px solid #0099cc;
-                    border-left: 2px solid #0099cc;
-                    border-right: 2px solid #0099cc;
-                }
-                .lab-end {
-                    border-bottom: 2px solid #0099cc;
-                    border-left: 2px solid #0099cc;
-                    border-right: 2px solid #0099cc;
-                }
-                .admin {
-                    background-color: #fff2e6;
-                }
-                .theory {
-                    background-color: #f2f2f2;
-                }
-                .free {
-                    background-color: #f9f9f9;
-                    color: #999;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>Class Timetable</h1>
-        """
+        w = f.write
+        w(HTML_HEADER)
         
         # Add generation timestamp
-        html_content += f"""
+        w(f"""
                 <p style="text-align: center;">Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-        """
+        """)
         
         # Add timetables for each section
-        for s in self.sections:
-            html_content += f"""
-                <h2>Section {s} Timetable</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Day</th>
-            """
-            
-            # Add period headers
-            for p in range(1, 8):
-                html_content += f"""
-                            <th>Period {p}<span class="period-time">{self.periods[p-1]["time"]}</span></th>
-                """
-            
-            html_content += """
-                        </tr>
-                    </thead>
-                    <tbody>
-            """
-            
-            # Add rows for each day
-            for d in self.days:
-                html_content += f"""
-                        <tr>
-                            <td>{d}</td>
-                """
-                
-                for p in range(1, 8):
-                    if p in self.solution[s][d]:
-                        course = self.solution[s][d][p]["course"]
-                        teacher = self.solution[s][d][p]["teacher"]
-                        
-                        # Determine cell class based on course type
-                        cell_class = ""
-                        if course == "FREE":
-                            cell_class = "free"
-                            html_content += f"""
-                            <td class="{cell_class}">
-                                <div class="course">FREE</div>
-                            </td>
-                            """
-                        elif course in ['PD', 'LIB', 'ACT']:
-                            cell_class = "admin"
-                            html_content += f"""
-                            <td class="{cell_class}">
-                                <div class="course">{course}</div>
-                                <div class="teacher">{teacher}</div>
-                            </td>
-                            """
-                        elif any(lab in course for lab in ['LAB']):
-                            # Check if this is part of a lab session
-                            if p == 4 or p == 6:  # Start of lab session
-                                cell_class = "lab lab-start"
-                            elif p == 5 or p == 7:  # End of lab session
-                                cell_class = "lab lab-end"
-                            else:
-                                cell_class = "lab"
-                            
-                            html_content += f"""
-                            <td class="{cell_class}">
-                                <div class="course">{course}</div>
-                                <div class="teacher">{teacher}</div>
-                            </td>
-                            """
-                        else:
-                            cell_class = "theory"
-                            html_content += f"""
-                            <td class="{cell_class}">
-                                <div class="course">{course}</div>
-                                <div class="teacher">{teacher}</div>
-                            </td>
-                            """
-                    else:
-                        html_content += """
-                            <td class="free">
-                                <div class="course">FREE</div>
-                            </td>
-                        """
-                
-                html_content += """
-                        </tr>
-                """
-            
-            html_content += """
-                    </tbody>
-                </table>
-            """
+        if _TIMETABLE_TEMPLATE is not None:
+            _TIMETABLE_TEMPLATE.stream(sections=self.sections,
+                                       days=self.days,
+                                       periods=self.periods,
+                                       solution=self.solution,
+                                       admin_courses=self.admin_courses,
+                                       lab_courses=self.lab_course_set).dump(f)
+        else:
+            for s in self.sections:
+                w(self._section_html(s))
         
         # Add statistics
-        html_content += """
+        w("""
                 <div class="stats">
                     <h2>Timetable Statistics</h2>
-        """
+        """)
         
         # Subject distribution
         for s in self.sections:
-            html_content += f"""
+            w(f"""
                     <h3>Section {s} Subject Distribution</h3>
                     <table>
                         <thead>
@@ -465,32 +674,25 @@ class TimetableGenerator:
                             </tr>
                         </thead>
                         <tbody>
-            """
-            
-            subject_counts = {}
-            for d in self.days:
-                for p in range(1, 8):
-                    if p in self.solution[s][d]:
-                        course = self.solution[s][d][p]["course"]
-                        subject_counts[course] = subject_counts.get(course, 0) + 1
+            """)
             
-            for subject, count in sorted(subject_counts.items()):
+            for subject, count in sorted(self.stats['subject_counts'][s].items()):
                 required = self.courses[subject][0]
-                html_content += f"""
+                w(f"""
                             <tr>
                                 <td>{subject}</td>
                                 <td>{count}</td>
                                 <td>{required}</td>
                             </tr>
-                """
+                """)
             
-            html_content += """
+            w("""
                         </tbody>
                     </table>
-            """
+            """)
         
         # Teacher workload
-        html_content += """
+        w("""
                     <h3>Teacher Workload</h3>
                     <table>
                         <thead>
@@ -500,51 +702,126 @@ class TimetableGenerator:
                             </tr>
                         </thead>
                         <tbody>
-        """
-        
-        teacher_workload = {}
-        for s in self.sections:
-            for d in self.days:
-                for p in range(1, 8):
-                    if p in self.solution[s][d]:
-                        teacher = self.solution[s][d][p]["teacher"]
-                        teacher_workload[teacher] = teacher_workload.get(teacher, 0) + 1
+        """)
         
-        for teacher, count in sorted(teacher_workload.items()):
-            html_content += f"""
+        for teacher, count in sorted(self.stats['teacher_workload'].items()):
+            w(f"""
                             <tr>
                                 <td>{teacher}</td>
                                 <td>{count}</td>
                             </tr>
-            """
+            """)
         
-        html_content += """
+        w("""
                         </tbody>
                     </table>
                 </div>
-        """
+        """)
         
         # Close HTML
-        html_content += """
+        w("""
                 <div class="footer">
                     Generated using Timetable Generator
                 </div>
             </div>
         </body>
         </html>
-        """
+        """)
+    
+    def _section_html(self, s):
+        # Fallback renderer for one section table when jinja2 is not installed
+        parts = []
+        parts.append(f"""
+                <h2>Section {s} Timetable</h2>
+                <table>
+                    <thead>
+                        <tr>
+                            <th>Day</th>
+            """)
         
-        # Write to file
-        try:
-            with open(output_file, 'w') as f:
-                f.write(html_content)
-            print(f"Timetable HTML saved to {output_file}")
-            return True
-        except Exception as e:
-            print(f"Error saving HTML: {e}")
-            return False
+        # Add period headers
+        for p in self.PERIODS_RANGE:
+            parts.append(f"""
+                            <th>Period {p}<span class="period-time">{self.period_times[p-1]}</span></th>
+                """)
+        
+        parts.append("""
+                        </tr>
+                    </thead>
+                    <tbody>
+            """)
+        
+        # Add rows for each day
+        for d in self.days:
+            parts.append(f"""
+                        <tr>
+                            <td>{d}</td>
+                """)
+            
+            for p in self.PERIODS_RANGE:
+                if p in self.solution[s][d]:
+                    course = self.solution[s][d][p]["course"]
+                    teacher = self.solution[s][d][p]["teacher"]
+                    
+                    # Determine cell class based on course type
+                    cell_class = ""
+                    if course == "FREE":
+                        cell_class = "free"
+                        parts.append(f"""
+                            <td class="{cell_class}">
+                                <div class="course">FREE</div>
+                            </td>
+                            """)
+                    elif course in self.admin_courses:
+                        cell_class = "admin"
+                        parts.append(f"""
+                            <td class="{cell_class}">
+                                <div class="course">{course}</div>
+                                <div class="teacher">{teacher}</div>
+                            </td>
+                            """)
+                    elif course in self.lab_course_set:
+                        # Check if this is part of a lab session
+                        if p == 4 or p == 6:  # Start of lab session
+                            cell_class = "lab lab-start"
+                        elif p == 5 or p == 7:  # End of lab session
+                            cell_class = "lab lab-end"
+                        else:
+                            cell_class = "lab"
+                        
+                        parts.append(f"""
+                            <td class="{cell_class}">
+                                <div class="course">{course}</div>
+                                <div class="teacher">{teacher}</div>
+                            </td>
+                            """)
+                    else:
+                        cell_class = "theory"
+                        parts.append(f"""
+                            <td class="{cell_class}">
+                                <div class="course">{course}</div>
+                                <div class="teacher">{teacher}</div>
+                            </td>
+                            """)
+                else:
+                    parts.append("""
+                            <td class="free">
+                                <div class="course">FREE</div>
+                            </td>
+                        """)
+            
+            parts.append("""
+                        </tr>
+                """)
+        
+        parts.append("""
+                    </tbody>
+                </table>
+            """)
+        
+        return ''.join(parts)
     
-    def run(self):
+    def run(self, feasibility_only=True):
         print("Starting timetable generation process...")
         self.generate_variables()
         print("Variables generated successfully")
@@ -552,17 +829,24 @@ class TimetableGenerator:
         self.add_constraints()
         print("Constraints added successfully")
         
+        if self.symmetric_sections:
+            self.add_symmetry_breaking()
+            print("Symmetry breaking added successfully")
+        
+        self.build_hint()
+        print("Solution hint added successfully")
+        
         print("Attempting to solve...")
-        success = self.solve()
+        success = self.solve(feasibility_only=feasibility_only)
         
-        if success:
-            print("Solution found! Generating output...")
-            self.print_timetable()
-            self.generate_html()
-            return True
-        else:
+        if not success:
             print("Failed to find a solution")
             return False
+        
+        print("Solution found! Generating output...")
+        self.print_timetable()
+        self.generate_html()
+        return True
 
 
 if __name__ == "__main__":
@@ -571,7 +855,23 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate a school timetable.')
     parser.add_argument('--free-periods', action='store_true', 
                         help='Include free periods in the timetable')
+    parser.add_argument('--symmetric-sections', action='store_true',
+                        help='Break section symmetry by ordering the EVS pattern across sections')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of CP-SAT search workers (default: CPU count capped at 8; '
+                             'with --all-workers, CPU count clamped to 8..16)')
+    parser.add_argument('--time-limit', type=float, default=120,
+                        help='Solver time limit in seconds')
+    parser.add_argument('--all-workers', action='store_true',
+                        help='Use the full default worker count (CPU count clamped to 8..16) '
+                             'instead of capping it at 8')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Print the CP-SAT search log')
     args = parser.parse_args()
     
-    generator = TimetableGenerator(include_free_periods=args.free_periods)
-    generator.run()
\ No newline at end of file
+    generator = TimetableGenerator(include_free_periods=args.free_periods,
+                                   workers=args.workers,
+                                   time_limit=args.time_limit,
+                                   symmetric_sections=args.symmetric_sections,
+                                   verbose=args.verbose)
+    generator.run(feasibility_only=not args.all_workers)
\ No newline at end of file